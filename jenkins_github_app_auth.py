@@ -9,9 +9,6 @@ import json
 import sys
 from typing import Optional
 
-from src.github_auth_app.app import GitHubApp
-from src.github_auth_app.config import Config
-
 
 def main():
     parser = argparse.ArgumentParser(description="Get GitHub App token for Jenkins")
@@ -27,6 +24,10 @@ def main():
 
     args = parser.parse_args()
 
+    # Deferred so --help and argument errors skip requests/jwt/cryptography
+    from src.github_auth_app.app import GitHubApp
+    from src.github_auth_app.config import Config
+
     try:
         # Create configuration
         config = Config(
@@ -39,16 +40,14 @@ def main():
         app = GitHubApp(config)
 
         # Get token
-        token = app.get_installation_token(int(args.installation_id))
+        installation_id = int(args.installation_id)
+        token = app.get_installation_token(installation_id)
 
         # Get expiration from cache if available
         expires_at: Optional[str] = None
-        cache_key = f"token_{args.installation_id}"
-        if cache_key in app._token_cache:
-            cached = app._token_cache[cache_key]
-            expires_datetime = cached.get("expires_at")
-            if expires_datetime:
-                expires_at = expires_datetime.isoformat()
+        expires_datetime = app.get_token_expiration(installation_id)
+        if expires_datetime:
+            expires_at = expires_datetime.isoformat()
 
         # Output in requested format
         if args.output_format == "token":
@@ -1,7 +1,24 @@
 # src/github_app_auth/__init__.py
 """GitHub App authentication library"""
-from .app import GitHubApp
-from .jenkins_helper import GitHubAppJenkinsHelper
+
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .app import GitHubApp
+    from .jenkins_helper import GitHubAppJenkinsHelper
 
 __version__ = "0.1.0"
 __all__ = ["GitHubApp", "GitHubAppJenkinsHelper"]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the public classes on first access to keep CLI startup light."""
+    if name == "GitHubApp":
+        from .app import GitHubApp
+
+        return GitHubApp
+    if name == "GitHubAppJenkinsHelper":
+        from .jenkins_helper import GitHubAppJenkinsHelper
+
+        return GitHubAppJenkinsHelper
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,17 +1,83 @@
+import asyncio
+import fcntl
+import functools
+import json
 import logging
+import os
+import threading
 import time
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Any, Dict, Optional, cast
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 import jwt
 import requests
 from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .config import Config
 
+try:
+    import orjson
+
+    _HAS_ORJSON = True
+except ImportError:  # pragma: no cover - optional speedup
+    _HAS_ORJSON = False
+
 logger = logging.getLogger(__name__)
 
+API_BASE = "https://api.github.com"
+
+# Refresh installation tokens this many seconds before GitHub's reported expiry
+TOKEN_REFRESH_MARGIN = 60.0
+
+# Remember repositories without an installation this many seconds
+INSTALLATION_NOT_FOUND_TTL = 60.0
+
+# Most app-level (JWT) GET responses remembered for ETag revalidation
+ETAG_CACHE_SIZE = 32
+
+# Bounds for transparently waiting out GitHub rate limits
+RATE_LIMIT_MAX_ATTEMPTS = 3
+RATE_LIMIT_MAX_WAIT = 60.0
+
+
+def _iso_z(dt: datetime) -> str:
+    """Format an aware UTC datetime the way GitHub does, e.g. 2024-01-01T00:00:00Z."""
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _retry_after_seconds(value: str) -> Optional[float]:
+    """Parse a Retry-After header given as delta-seconds or an HTTP date."""
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+@functools.lru_cache(maxsize=4)
+def _load_pem_private_key(key_path: str, mtime_ns: int) -> RSAPrivateKey:
+    """Parse a PEM private key, shared by every GitHubApp using the same file.
+
+    The modification time is part of the cache key so a rotated key file is
+    picked up without restarting the process.
+    """
+    with open(key_path, "rb") as key_file:
+        private_key = serialization.load_pem_private_key(key_file.read(), password=None)
+    if not isinstance(private_key, RSAPrivateKey):
+        raise ValueError(f"Private key at {key_path} is not an RSA key")
+    return private_key
+
 
 class GitHubApp:
     """Handles GitHub App authentication and token management."""
@@ -19,43 +85,200 @@ class GitHubApp:
     def __init__(self, config: Config):
         """Initialize GitHub App with configuration."""
         self.config = config
-        self._private_key: Optional[bytes] = None
-        self._token_cache: Dict[str, Dict[str, Any]] = {}
+        self._private_key: Optional[RSAPrivateKey] = None
+        self._jwt: Optional[str] = None
+        self._jwt_exp: int = 0
+        self._jwt_lock = threading.Lock()
+        # installation_id -> (token, expires_at as epoch seconds)
+        self._token_cache: Dict[int, Tuple[str, float]] = {}
+        self._cache_lock = threading.Lock()
+        self._refresh_locks: Dict[int, threading.Lock] = {}
+        self._install_id_cache: Dict[Tuple[str, str], int] = {}
+        # (owner, repo) -> time.monotonic() until which a 404 is remembered
+        self._install_missing_until: Dict[Tuple[str, str], float] = {}
+        # url -> (ETag, raw body) for conditional GETs made with the app JWT
+        self._etag_cache: Dict[str, Tuple[str, bytes]] = {}
+        self._rate_limited_until = 0.0  # time.monotonic() deadline
+        # Tokens rejected before expiry (revoked); should stay near zero
+        self._unexpected_401_count = 0
+
+        # Reuse TLS connections to the GitHub API across requests
+        self._session = requests.Session()
+        self._session.headers.update(
+            {
+                "Accept": "application/vnd.github.v3+json",
+                "User-Agent": f"GitHubApp/{self.config.app_id}",
+            }
+        )
+        self._session.mount(
+            "https://",
+            HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=10,
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.3,
+                    status_forcelist=[502, 503, 504],
+                    # Rate limits are handled by _send_github_request
+                    respect_retry_after_header=False,
+                ),
+            ),
+        )
+
+        self._load_disk_cache()
 
-    def _load_private_key(self) -> bytes:
-        """Load and cache the private key."""
+    def close(self) -> None:
+        """Close the underlying HTTP session and release pooled connections."""
+        self._session.close()
+
+    def __enter__(self) -> "GitHubApp":
+        """Enter a context that closes the HTTP session on exit."""
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        """Close the HTTP session when leaving the context."""
+        self.close()
+
+    def _load_private_key(self) -> RSAPrivateKey:
+        """Load and cache the parsed private key object."""
         if self._private_key is None:
             if self.config.private_key_path is None:
                 raise ValueError("Private key path must be set in the configuration.")
 
             key_path = Path(self.config.private_key_path)
-            if not key_path.exists():
-                raise FileNotFoundError(f"Private key not found at {key_path}")
+            try:
+                mtime_ns = key_path.stat().st_mtime_ns
+            except FileNotFoundError as e:
+                raise FileNotFoundError(f"Private key not found at {key_path}") from e
 
-            with open(key_path, "rb") as key_file:
-                private_key = serialization.load_pem_private_key(
-                    key_file.read(), password=None
-                )
-                # Serialize the key back to PEM format bytes
-                self._private_key = private_key.private_bytes(
-                    encoding=serialization.Encoding.PEM,
-                    format=serialization.PrivateFormat.PKCS8,
-                    encryption_algorithm=serialization.NoEncryption(),
-                )
+            # Keep the parsed key so PyJWT can sign without re-reading the PEM
+            self._private_key = _load_pem_private_key(str(key_path), mtime_ns)
         return self._private_key
 
     def _create_jwt(self) -> str:
-        """Create a JWT for GitHub App authentication."""
-        private_key = self._load_private_key()
+        """Create a JWT for GitHub App authentication.
+
+        The signed JWT is cached and reused until it is within 60 seconds of
+        expiring, so bursts of API calls only pay for one RSA signature.
+        Concurrent callers wait for a single signature instead of each
+        signing their own.
+        """
         now = int(time.time())
+        # Read the expiry first; writers publish the JWT before its expiry
+        jwt_exp = self._jwt_exp
+        cached_jwt = self._jwt
+        if cached_jwt is not None and now < jwt_exp - 60:
+            return cached_jwt
+
+        with self._jwt_lock:
+            # Another thread may have signed a fresh JWT while we waited
+            now = int(time.time())
+            if self._jwt is not None and now < self._jwt_exp - 60:
+                return self._jwt
+
+            private_key = self._load_private_key()
+            # Backdate iat and stay well under GitHub's 10 minute limit so a
+            # server clock slightly ahead of GitHub's is not rejected
+            expires = now + 480
+            payload = {
+                "iat": now - 30,
+                "exp": expires,
+                "iss": self.config.app_id,
+            }
 
-        payload = {
-            "iat": now,
-            "exp": now + 600,  # 10 minutes
-            "iss": self.config.app_id,
-        }
+            signed = jwt.encode(payload, private_key, algorithm="RS256")
+            self._jwt = signed
+            self._jwt_exp = expires
+            return signed
+
+    def _send_github_request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """Send a request to GitHub API and raise for error statuses.
+
+        Accept and User-Agent are set once on the session, so callers only
+        pass the per-request Authorization header.
+        """
+        if _HAS_ORJSON and kwargs.get("json") is not None:
+            # Serialize request bodies with orjson when it is installed
+            kwargs["data"] = orjson.dumps(kwargs.pop("json"))
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+
+        for attempt in range(1, RATE_LIMIT_MAX_ATTEMPTS + 1):
+            self._wait_for_rate_limit()
+            response = self._session.request(method, url, headers=headers, **kwargs)
+
+            delay = self._rate_limit_delay(response)
+            if delay is None:
+                break
+            if delay > RATE_LIMIT_MAX_WAIT:
+                # Retrying before the reset is certain to fail, so fail now
+                if response.status_code in (403, 429):
+                    logger.warning(
+                        f"Rate limited by GitHub for {delay:.0f}s, not retrying "
+                        f"{method} {url}"
+                    )
+                break
+            self._defer_requests(delay)
+            if response.status_code not in (403, 429):
+                # Quota just ran out; the next request will wait for the reset
+                break
+            if attempt < RATE_LIMIT_MAX_ATTEMPTS:
+                logger.warning(
+                    f"Rate limited by GitHub, retrying {method} {url} in {delay:.0f}s"
+                )
 
-        return jwt.encode(payload, private_key, algorithm="RS256")
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _rate_limit_delay(response: requests.Response) -> Optional[float]:
+        """Return how long GitHub asks us to wait, or None if not rate limited."""
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None and response.status_code in (403, 429):
+            delay = _retry_after_seconds(retry_after)
+            if delay is not None:
+                return delay
+
+        if response.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                reset = float(response.headers["X-RateLimit-Reset"])
+            except (KeyError, ValueError):
+                # Without a usable reset time, don't hammer the API with retries
+                return None
+            return max(reset - time.time(), 0.0)
+        return None
+
+    def _defer_requests(self, delay: float) -> None:
+        """Make every thread using this app wait at least ``delay`` seconds."""
+        with self._cache_lock:
+            self._rate_limited_until = max(
+                self._rate_limited_until, time.monotonic() + delay
+            )
+
+    def _wait_for_rate_limit(self) -> None:
+        """Sleep until any rate-limit pause shared by all threads has passed."""
+        remaining = self._rate_limited_until - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    @staticmethod
+    def _decode_json(response: requests.Response) -> Any:
+        """Decode a JSON response body, using orjson when it is installed."""
+        if _HAS_ORJSON:
+            return orjson.loads(response.content)
+        return response.json()
+
+    @staticmethod
+    def _loads_json(content: bytes) -> Any:
+        """Decode a raw JSON body, using orjson when it is installed."""
+        if _HAS_ORJSON:
+            return orjson.loads(content)
+        return json.loads(content)
 
     def _make_github_request(
         self,
@@ -64,66 +287,230 @@ class GitHubApp:
         headers: Optional[Dict[str, str]] = None,
         **kwargs: Any,
     ) -> Dict[str, Any]:
-        """Make a request to GitHub API with error handling."""
-        if headers is None:
-            headers = {}
-
-        headers.update(
-            {
-                "Accept": "application/vnd.github.v3+json",
-                "User-Agent": f"GitHubApp/{self.config.app_id}",
-            }
-        )
-
-        response = requests.request(method, url, headers=headers, **kwargs)
-        response.raise_for_status()
-        return cast(Dict[str, Any], response.json())
+        """Make a request to GitHub API with error handling.
+
+        GET requests signed with the app JWT are revalidated with
+        If-None-Match, so an unchanged resource comes back as a 304 that does
+        not count against the rate limit. They are keyed by URL alone because
+        an instance only ever signs JWTs for one app.
+        """
+        authorization = (headers or {}).get("Authorization", "")
+        if method != "GET" or not authorization.startswith("Bearer "):
+            response = self._send_github_request(method, url, headers=headers, **kwargs)
+            return cast(Dict[str, Any], self._decode_json(response))
+
+        cached = self._etag_cache.get(url)
+        if cached is not None:
+            headers = {**(headers or {}), "If-None-Match": cached[0]}
+
+        response = self._send_github_request(method, url, headers=headers, **kwargs)
+        if cached is not None and response.status_code == 304:
+            # Decode again so callers never share a mutable cached body
+            return cast(Dict[str, Any], self._loads_json(cached[1]))
+
+        data = cast(Dict[str, Any], self._decode_json(response))
+        etag = response.headers.get("ETag")
+        if isinstance(etag, str):
+            with self._cache_lock:
+                self._etag_cache.pop(url, None)
+                if len(self._etag_cache) >= ETAG_CACHE_SIZE:
+                    # Dicts keep insertion order, so this drops the oldest entry
+                    del self._etag_cache[next(iter(self._etag_cache))]
+                self._etag_cache[url] = (etag, response.content)
+        return data
+
+    def _get_paginated(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        items_key: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Collect every item from a paginated GET by following Link headers."""
+        items: List[Dict[str, Any]] = []
+        next_url: Optional[str] = url
+        while next_url:
+            response = self._send_github_request("GET", next_url, headers=headers)
+            page = self._decode_json(response)
+            items.extend(page[items_key] if items_key else page)
+            next_url = response.links.get("next", {}).get("url")
+        return items
 
     def get_app_info(self) -> Dict[str, Any]:
         """Get information about the GitHub App."""
         jwt_token = self._create_jwt()
         return self._make_github_request(
             "GET",
-            "https://api.github.com/app",
+            f"{API_BASE}/app",
             headers={"Authorization": f"Bearer {jwt_token}"},
         )
 
     def get_installation_id(self, owner: str, repo: str) -> Optional[int]:
-        """Get installation ID for a specific repository."""
+        """Get installation ID for a specific repository.
+
+        Installation IDs rarely change, so lookups are cached for the lifetime
+        of the instance. Repositories without an installation are remembered
+        for INSTALLATION_NOT_FOUND_TTL seconds.
+        """
+        cached_id = self._install_id_cache.get((owner, repo))
+        if cached_id is not None:
+            return cached_id
+
+        missing_until = self._install_missing_until.get((owner, repo))
+        if missing_until is not None and time.monotonic() < missing_until:
+            return None
+
         jwt_token = self._create_jwt()
 
         try:
             data = self._make_github_request(
                 "GET",
-                f"https://api.github.com/repos/{owner}/{repo}/installation",
+                self._repo_url(owner, repo, "installation"),
                 headers={"Authorization": f"Bearer {jwt_token}"},
             )
-            return int(data["id"])
+            installation_id = int(data["id"])
+            self._install_id_cache[(owner, repo)] = installation_id
+            return installation_id
         except requests.HTTPError as e:
             if e.response.status_code == 404:
                 logger.warning(f"No installation found for {owner}/{repo}")
+                self._install_missing_until[(owner, repo)] = (
+                    time.monotonic() + INSTALLATION_NOT_FOUND_TTL
+                )
                 return None
             raise
 
+    def preload_installations(self, orgs: Optional[List[str]] = None) -> int:
+        """
+        Fill the installation ID cache for every repository the app can access.
+
+        Costs one listing per installation instead of one lookup per
+        repository, so later repository calls skip the installation lookup.
+
+        Args:
+            orgs: Only preload installations on these account logins
+
+        Returns:
+            Number of repositories added to the cache
+        """
+        jwt_token = self._create_jwt()
+        installations = self._get_paginated(
+            f"{API_BASE}/app/installations?per_page=100",
+            headers={"Authorization": f"Bearer {jwt_token}"},
+        )
+
+        wanted = {org.lower() for org in orgs} if orgs else None
+        count = 0
+        for installation in installations:
+            # Enterprise accounts have a slug and name but no login
+            login = (installation.get("account") or {}).get("login")
+            if wanted is not None and (login is None or login.lower() not in wanted):
+                continue
+
+            installation_id = int(installation["id"])
+            token = self.get_installation_token(installation_id)
+            repositories = self._get_paginated(
+                f"{API_BASE}/installation/repositories?per_page=100",
+                headers=self._auth_header(token),
+                items_key="repositories",
+            )
+            for repository in repositories:
+                owner = repository["owner"]["login"]
+                self._install_id_cache[(owner, repository["name"])] = installation_id
+                count += 1
+
+        logger.debug(f"Preloaded installation IDs for {count} repositories")
+        return count
+
     def get_installation_token(
-        self, installation_id: int, permissions: Optional[Dict[str, str]] = None
+        self,
+        installation_id: int,
+        permissions: Optional[Dict[str, str]] = None,
+        force_refresh: bool = False,
     ) -> str:
-        """Get an installation access token."""
-        cache_key = f"token_{installation_id}"
-
-        # Check cache
-        if cache_key in self._token_cache:
-            cached = self._token_cache[cache_key]
-            expires_at = cached.get("expires_at")
-            if expires_at and isinstance(expires_at, datetime):
-                if datetime.now(timezone.utc) < expires_at - timedelta(minutes=5):
-                    return str(cached["token"])
-
-        # Create new token
-        jwt_token = self._create_jwt()
-        url = (
-            f"https://api.github.com/app/installations/{installation_id}/access_tokens"
+        """Get an installation access token.
+
+        Concurrent callers for the same installation share a single refresh:
+        the first thread mints the token while the others wait on the
+        installation's lock and then read it from the cache.
+
+        Args:
+            installation_id: GitHub App installation ID
+            permissions: Optional permissions to request; scoped tokens are
+                minted on every call and never cached
+            force_refresh: Ignore any cached token, e.g. after it was revoked
+        """
+        if permissions:
+            # The cache holds full-scope tokens only, so it must not serve or
+            # store a token narrowed to (or requested for) other permissions
+            return self._request_installation_token(installation_id, permissions)
+
+        # Fast path: check cache without locking
+        cached_token = (
+            None if force_refresh else self._get_cached_token(installation_id)
         )
+        if cached_token is not None:
+            return cached_token
+
+        with self._refresh_lock(installation_id):
+            # Another thread may have refreshed the token while we waited
+            if not force_refresh:
+                cached_token = self._get_cached_token(installation_id)
+                if cached_token is not None:
+                    return cached_token
+
+            return self._request_installation_token(installation_id, None)
+
+    def _refresh_lock(self, installation_id: int) -> threading.Lock:
+        """Return the lock serializing token refreshes for an installation."""
+        with self._cache_lock:
+            return self._refresh_locks.setdefault(installation_id, threading.Lock())
+
+    def _replace_rejected_token(self, installation_id: int, rejected: str) -> str:
+        """Re-mint a token GitHub rejected, unless another thread already did.
+
+        Concurrent requests that hit the same revoked token all end up here;
+        only the first re-mints, the rest reuse its replacement.
+        """
+        with self._refresh_lock(installation_id):
+            cached_token = self._get_cached_token(installation_id)
+            if cached_token is not None and cached_token != rejected:
+                return cached_token
+            return self._request_installation_token(installation_id, None)
+
+    def get_token_expiration(self, installation_id: int) -> Optional[datetime]:
+        """
+        Get the expiration time of the cached token for an installation.
+
+        Args:
+            installation_id: GitHub App installation ID
+
+        Returns:
+            Expiration time of the cached token, or None if nothing is cached
+        """
+        cached = self._token_cache.get(installation_id)
+        if cached is None:
+            return None
+        return datetime.fromtimestamp(cached[1], tz=timezone.utc)
+
+    def _get_cached_token(self, installation_id: int) -> Optional[str]:
+        """Return a cached token if it is not close to expiring."""
+        cached = self._token_cache.get(installation_id)
+        if cached is None:
+            return None
+
+        token, expires_at = cached
+        if time.time() < expires_at - TOKEN_REFRESH_MARGIN:
+            return token
+        return None
+
+    def _request_installation_token(
+        self,
+        installation_id: int,
+        permissions: Optional[Dict[str, str]],
+    ) -> str:
+        """Request a new installation token from GitHub and cache it."""
+        jwt_token = self._create_jwt()
+        url = f"{API_BASE}/app/installations/{installation_id}/access_tokens"
 
         body: Dict[str, Any] = {}
         if permissions:
@@ -136,17 +523,106 @@ class GitHubApp:
             json=body if body else None,
         )
 
-        # Cache the token
+        # Cache full-scope tokens only
         expires_at_str = data.get("expires_at")
-        if expires_at_str:
-            expires_at = datetime.fromisoformat(expires_at_str.replace("Z", "+00:00"))
-            self._token_cache[cache_key] = {
-                "token": data["token"],
-                "expires_at": expires_at,
-            }
+        if expires_at_str and not permissions:
+            # Python 3.11+ parses GitHub's trailing "Z" directly
+            expires_at = datetime.fromisoformat(expires_at_str).timestamp()
+            with self._cache_lock:
+                self._token_cache[installation_id] = (data["token"], expires_at)
+            self._save_disk_cache()
 
         return str(data["token"])
 
+    def _load_disk_cache(self) -> None:
+        """Seed the token cache from the on-disk cache file, if configured."""
+        if not self.config.token_cache_path:
+            return
+
+        cache_path = Path(self.config.token_cache_path)
+        if not cache_path.exists():
+            return
+
+        try:
+            with open(cache_path, "r", encoding="utf-8") as cache_file:
+                fcntl.flock(cache_file, fcntl.LOCK_SH)
+                stored = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable token cache {cache_path}: {e}")
+            return
+        app_entries = (
+            stored.get(str(self.config.app_id), {})
+            if isinstance(stored, dict)
+            else None
+        )
+        if not isinstance(app_entries, dict):
+            logger.warning(
+                f"Ignoring unreadable token cache {cache_path}: unexpected layout"
+            )
+            return
+
+        for cache_key, entry in app_entries.items():
+            try:
+                if not isinstance(entry, dict):
+                    raise TypeError(f"expected an object, got {type(entry).__name__}")
+                token, expires_at = entry["token"], entry["expires_at"]
+                if not isinstance(token, str) or not isinstance(expires_at, str):
+                    raise TypeError("token and expires_at must be strings")
+                installation_id = int(cache_key.removeprefix("token_"))
+                self._token_cache[installation_id] = (
+                    token,
+                    datetime.fromisoformat(expires_at).timestamp(),
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(
+                    f"Ignoring unreadable token cache entry {cache_key} "
+                    f"in {cache_path}: {e!r}"
+                )
+
+    def _save_disk_cache(self) -> None:
+        """Write unexpired cached tokens to the on-disk cache file (mode 0600)."""
+        if not self.config.token_cache_path:
+            return
+
+        cache_path = Path(self.config.token_cache_path)
+        try:
+            cache_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            fd = os.open(cache_path, os.O_RDWR | os.O_CREAT, 0o600)
+            with os.fdopen(fd, "r+", encoding="utf-8") as cache_file:
+                fcntl.flock(cache_file, fcntl.LOCK_EX)
+                os.fchmod(cache_file.fileno(), 0o600)
+
+                # Snapshot while holding the file lock so the last writer
+                # includes tokens other threads added in the meantime
+                with self._cache_lock:
+                    cached_tokens = list(self._token_cache.items())
+                now = time.time()
+                entries = {
+                    f"token_{installation_id}": {
+                        "token": token,
+                        "expires_at": _iso_z(
+                            datetime.fromtimestamp(expires_at, tz=timezone.utc)
+                        ),
+                    }
+                    for installation_id, (token, expires_at) in cached_tokens
+                    if expires_at > now
+                }
+
+                # Keep entries written by other apps sharing the same file
+                try:
+                    stored = json.loads(cache_file.read() or "{}")
+                except ValueError:
+                    stored = {}
+                if not isinstance(stored, dict):
+                    stored = {}
+                stored[str(self.config.app_id)] = entries
+
+                cache_file.seek(0)
+                cache_file.truncate()
+                json.dump(stored, cache_file)
+        except OSError as e:
+            logger.warning(f"Could not write token cache {cache_path}: {e}")
+
     def get_repository_token(self, owner: str, repo: str) -> Optional[str]:
         """Get an installation token for a specific repository."""
         installation_id = self.get_installation_id(owner, repo)
@@ -155,6 +631,45 @@ class GitHubApp:
 
         return self.get_installation_token(installation_id)
 
+    @staticmethod
+    def _repo_url(owner: str, repo: str, *parts: str) -> str:
+        """Build a ``/repos/{owner}/{repo}/...`` API URL."""
+        return "/".join((API_BASE, "repos", owner, repo, *parts))
+
+    @staticmethod
+    def _auth_header(token: str) -> Dict[str, str]:
+        """Build the Authorization header for an installation token."""
+        return {"Authorization": f"token {token}"}
+
+    def _make_repository_request(
+        self, owner: str, repo: str, method: str, url: str, **kwargs: Any
+    ) -> Dict[str, Any]:
+        """Make a request authenticated with the repository's installation token.
+
+        Tokens are refreshed ahead of expiry by get_installation_token, so a 401
+        here means the token was revoked; it is re-minted and retried once.
+        """
+        installation_id = self.get_installation_id(owner, repo)
+        if installation_id is None:
+            raise ValueError(f"No installation found for {owner}/{repo}")
+
+        token = self.get_installation_token(installation_id)
+        try:
+            return self._make_github_request(
+                method, url, headers=self._auth_header(token), **kwargs
+            )
+        except requests.HTTPError as e:
+            if e.response is None or e.response.status_code != 401:
+                raise
+            with self._cache_lock:
+                self._unexpected_401_count += 1
+            logger.warning(f"Token for {owner}/{repo} was rejected, refreshing")
+
+        token = self._replace_rejected_token(installation_id, token)
+        return self._make_github_request(
+            method, url, headers=self._auth_header(token), **kwargs
+        )
+
     def create_check_run(
         self,
         owner: str,
@@ -165,11 +680,7 @@ class GitHubApp:
         **kwargs: Any,
     ) -> Dict[str, Any]:
         """Create a check run for a commit."""
-        token = self.get_repository_token(owner, repo)
-        if not token:
-            raise ValueError(f"No installation found for {owner}/{repo}")
-
-        url = f"https://api.github.com/repos/{owner}/{repo}/check-runs"
+        url = self._repo_url(owner, repo, "check-runs")
         body = {
             "name": name,
             "head_sha": head_sha,
@@ -177,23 +688,15 @@ class GitHubApp:
             **kwargs,
         }
 
-        return self._make_github_request(
-            "POST", url, headers={"Authorization": f"token {token}"}, json=body
-        )
+        return self._make_repository_request(owner, repo, "POST", url, json=body)
 
     def update_check_run(
         self, owner: str, repo: str, check_run_id: int, **kwargs: Any
     ) -> Dict[str, Any]:
         """Update an existing check run."""
-        token = self.get_repository_token(owner, repo)
-        if not token:
-            raise ValueError(f"No installation found for {owner}/{repo}")
-
-        url = f"https://api.github.com/repos/{owner}/{repo}/check-runs/{check_run_id}"
+        url = self._repo_url(owner, repo, "check-runs", str(check_run_id))
 
-        return self._make_github_request(
-            "PATCH", url, headers={"Authorization": f"token {token}"}, json=kwargs
-        )
+        return self._make_repository_request(owner, repo, "PATCH", url, json=kwargs)
 
     def create_deployment(
         self,
@@ -204,11 +707,7 @@ class GitHubApp:
         **kwargs: Any,
     ) -> Dict[str, Any]:
         """Create a deployment."""
-        token = self.get_repository_token(owner, repo)
-        if not token:
-            raise ValueError(f"No installation found for {owner}/{repo}")
-
-        url = f"https://api.github.com/repos/{owner}/{repo}/deployments"
+        url = self._repo_url(owner, repo, "deployments")
         body = {
             "ref": ref,
             "environment": environment,
@@ -216,9 +715,7 @@ class GitHubApp:
             **kwargs,
         }
 
-        return self._make_github_request(
-            "POST", url, headers={"Authorization": f"token {token}"}, json=body
-        )
+        return self._make_repository_request(owner, repo, "POST", url, json=body)
 
     def create_deployment_status(
         self,
@@ -229,13 +726,34 @@ class GitHubApp:
         **kwargs: Any,
     ) -> Dict[str, Any]:
         """Create a deployment status."""
-        token = self.get_repository_token(owner, repo)
-        if not token:
-            raise ValueError(f"No installation found for {owner}/{repo}")
-
-        url = f"https://api.github.com/repos/{owner}/{repo}/deployments/{deployment_id}/statuses"
+        url = self._repo_url(owner, repo, "deployments", str(deployment_id), "statuses")
         body = {"state": state, **kwargs}
 
-        return self._make_github_request(
-            "POST", url, headers={"Authorization": f"token {token}"}, json=body
+        return self._make_repository_request(owner, repo, "POST", url, json=body)
+
+    async def aget_installation_token(
+        self, installation_id: int, permissions: Optional[Dict[str, str]] = None
+    ) -> str:
+        """Async variant of get_installation_token run in a worker thread."""
+        return await asyncio.to_thread(
+            self.get_installation_token, installation_id, permissions
+        )
+
+    async def acreate_check_run(
+        self,
+        owner: str,
+        repo: str,
+        name: str,
+        head_sha: str,
+        status: str = "queued",
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        """
+        Async variant of create_check_run run in a worker thread.
+
+        Concurrent calls share the pooled session, so a batch gathered with
+        ``asyncio.gather`` runs over up to 10 kept-alive connections.
+        """
+        return await asyncio.to_thread(
+            self.create_check_run, owner, repo, name, head_sha, status, **kwargs
         )
@@ -1,7 +1,18 @@
 """Configuration module for GitHub App."""
 
 import os
-from typing import Optional
+from typing import Optional, Tuple
+
+
+def _read_env() -> Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]:
+    """Read all configuration environment variables in a single pass."""
+    environ = os.environ
+    return (
+        environ.get("GITHUB_APP_ID"),
+        environ.get("GITHUB_APP_PRIVATE_KEY_PATH"),
+        environ.get("GITHUB_APP_INSTALLATION_ID"),
+        environ.get("GITHUB_APP_TOKEN_CACHE_PATH"),
+    )
 
 
 class Config:
@@ -12,6 +23,7 @@ class Config:
         app_id: Optional[str] = None,
         private_key_path: Optional[str] = None,
         installation_id: Optional[str] = None,
+        token_cache_path: Optional[str] = None,
     ):
         """
         Initialize configuration.
@@ -20,14 +32,14 @@ class Config:
             app_id: GitHub App ID (defaults to GITHUB_APP_ID env var)
             private_key_path: Path to private key (defaults to GITHUB_APP_PRIVATE_KEY_PATH env var)
             installation_id: Installation ID (defaults to GITHUB_APP_INSTALLATION_ID env var)
+            token_cache_path: File used to persist installation tokens between runs
+                (defaults to GITHUB_APP_TOKEN_CACHE_PATH env var, disabled if unset)
         """
-        self.app_id = app_id or os.environ.get("GITHUB_APP_ID")
-        self.private_key_path = private_key_path or os.environ.get(
-            "GITHUB_APP_PRIVATE_KEY_PATH"
-        )
-        self.installation_id = installation_id or os.environ.get(
-            "GITHUB_APP_INSTALLATION_ID"
-        )
+        env_app_id, env_key_path, env_installation_id, env_cache_path = _read_env()
+        self.app_id = app_id or env_app_id
+        self.private_key_path = private_key_path or env_key_path
+        self.installation_id = installation_id or env_installation_id
+        self.token_cache_path = token_cache_path or env_cache_path
 
         # Validate required fields
         if not self.app_id:
@@ -49,5 +61,6 @@ class Config:
         return (
             f"Config(app_id={self.app_id!r}, "
             f"private_key_path={self.private_key_path!r}, "
-            f"installation_id={self.installation_id!r})"
+            f"installation_id={self.installation_id!r}, "
+            f"token_cache_path={self.token_cache_path!r})"
         )
@@ -1,41 +1,39 @@
-import os
-import tempfile
 from datetime import datetime, timedelta, timezone
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 
+from github_auth_app.app import GitHubApp, _iso_z
 from github_auth_app.config import Config
 
+# Introspect GitHubApp once; Mock(spec=<list>) skips per-test class inspection
+GITHUB_APP_SPEC = dir(GitHubApp)
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def mock_private_key():
-    """Generate a test RSA private key"""
+    """Generate a test RSA private key, shared across the session"""
     private_key = rsa.generate_private_key(
         public_exponent=65537, key_size=2048, backend=default_backend()
     )
     return private_key
 
 
-@pytest.fixture
-def private_key_file(mock_private_key):
-    """Create a temporary private key file"""
-    with tempfile.NamedTemporaryFile(mode="wb", delete=False, suffix=".pem") as f:
-        pem = mock_private_key.private_bytes(
+@pytest.fixture(scope="session")
+def private_key_file(mock_private_key, tmp_path_factory):
+    """Write the test private key to a session-wide temporary file"""
+    key_path = tmp_path_factory.mktemp("keys") / "key.pem"
+    key_path.write_bytes(
+        mock_private_key.private_bytes(
             encoding=serialization.Encoding.PEM,
             format=serialization.PrivateFormat.PKCS8,
             encryption_algorithm=serialization.NoEncryption(),
         )
-        f.write(pem)
-        temp_path = f.name
-
-    yield temp_path
-
-    # Cleanup
-    os.unlink(temp_path)
+    )
+    return str(key_path)
 
 
 @pytest.fixture
@@ -56,23 +54,31 @@ def mock_time():
         yield mock
 
 
-@pytest.fixture
-def mock_requests():
-    """Mock requests library"""
-    with patch("github_auth_app.app.requests") as mock:
-        mock.exceptions.HTTPError = type("HTTPError", (Exception,), {})
-        mock.HTTPError = mock.exceptions.HTTPError
-        yield mock
-
-
 @pytest.fixture
 def valid_installation_token():
     """Generate a valid installation token response"""
     expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
     return {
         "token": "ghs_test_installation_token_123456789",
-        "expires_at": expires_at.isoformat().replace(
-            "+00:00", "Z"
-        ),  # GitHub uses 'Z' suffix
+        "expires_at": _iso_z(expires_at),  # GitHub uses 'Z' suffix
         "permissions": {"contents": "write", "metadata": "read"},
     }
+
+
+@pytest.fixture(scope="module")
+def shared_github_app_mock():
+    """GitHubApp mock built once per module and reset by mock_github_app"""
+    return Mock(spec=GITHUB_APP_SPEC)
+
+
+@pytest.fixture
+def mock_github_app(shared_github_app_mock):
+    """Mock GitHubApp instance that finds a token for any repository"""
+    app = shared_github_app_mock
+    app.reset_mock(return_value=True, side_effect=True)
+    app.get_repository_token.return_value = "test_token_123456"
+    app.get_installation_id.return_value = 12345
+    app.get_token_expiration.return_value = datetime.now(timezone.utc) + timedelta(
+        hours=1
+    )
+    return app
@@ -1,13 +1,24 @@
-from unittest.mock import Mock, patch
+import json
+import os
+import stat
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
 
 import jwt
 import pytest
+import requests
+import responses
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPrivateKey
 
-from github_auth_app.app import GitHubApp
+from github_auth_app.app import API_BASE, GitHubApp
 from github_auth_app.config import Config
-from tests.fixtures.mock_responses import (
-    INSTALLATION_REPOS_RESPONSE,
-)
+from tests.fixtures.mock_responses import INSTALLATION_REPOS_BODY
+
+INSTALLATION_URL = f"{API_BASE}/repos/test-org/test-repo/installation"
+TOKEN_URL = f"{API_BASE}/app/installations/789012/access_tokens"
 
 
 class TestGitHubApp:
@@ -27,9 +38,14 @@ class TestGitHubApp:
         """Test private key loading"""
         app = GitHubApp(github_app_config)
         key = app._load_private_key()
-        assert key is not None
-        assert isinstance(key, bytes)
-        assert b"BEGIN PRIVATE KEY" in key
+        assert isinstance(key, RSAPrivateKey)
+        assert app._load_private_key() is key
+
+    def test_private_key_shared_between_instances(self, github_app_config):
+        """Test that apps using the same key file share one parsed key"""
+        first = GitHubApp(github_app_config)._load_private_key()
+        second = GitHubApp(github_app_config)._load_private_key()
+        assert first is second
 
     def test_load_private_key_file_not_found(self):
         """Test error handling when private key file doesn't exist"""
@@ -52,8 +68,51 @@ class TestGitHubApp:
         decoded = jwt.decode(token, options={"verify_signature": False})
 
         assert decoded["iss"] == github_app_config.app_id
-        assert decoded["iat"] == 1234567890
-        assert decoded["exp"] == 1234567890 + 600  # 10 minutes
+        assert decoded["iat"] == 1234567890 - 30  # backdated for clock skew
+        assert decoded["exp"] == 1234567890 + 480  # 8 minutes
+
+    def test_create_jwt_reuses_cached_token(self, github_app_config):
+        """Test that a still-valid JWT is reused instead of re-signed"""
+        app = GitHubApp(github_app_config)
+
+        with patch("time.time", return_value=1234567890):
+            first = app._create_jwt()
+        with patch("time.time", return_value=1234567890 + 300):
+            second = app._create_jwt()
+        with patch("time.time", return_value=1234567890 + 520):
+            third = app._create_jwt()
+
+        assert first == second
+        assert third != first
+
+    def test_jwt_cached_between_calls(self, github_app_config):
+        """Test that repeated JWT requests sign only once"""
+        app = GitHubApp(github_app_config)
+
+        with (
+            patch("time.time", return_value=1234567890),
+            patch("github_auth_app.app.jwt.encode", return_value="signed") as encode,
+        ):
+            assert app._create_jwt() == "signed"
+            assert app._create_jwt() == "signed"
+
+        encode.assert_called_once()
+
+    def test_concurrent_callers_share_one_jwt_signature(self, github_app_config):
+        """Test that threads racing on an empty JWT cache sign only once"""
+        app = GitHubApp(github_app_config)
+        start = threading.Barrier(8)
+
+        def fetch_jwt(_):
+            start.wait()
+            return app._create_jwt()
+
+        with patch("jwt.encode", wraps=jwt.encode) as mock_encode:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                tokens = set(executor.map(fetch_jwt, range(8)))
+
+        assert len(tokens) == 1
+        mock_encode.assert_called_once()
 
     def test_jwt_expiration_time(self, github_app_config):
         """Test that JWT expiration is within GitHub's limits"""
@@ -66,161 +125,294 @@ class TestGitHubApp:
             # GitHub Apps JWT must expire within 10 minutes
             expiration_delta = decoded["exp"] - decoded["iat"]
             assert expiration_delta <= 600  # 10 minutes
-            assert expiration_delta > 0
+            assert expiration_delta == 510
 
-    def test_get_app_info(self, github_app_config, mock_requests):
+    @responses.activate
+    def test_get_app_info(self, github_app_config):
         """Test getting app info"""
         app = GitHubApp(github_app_config)
 
-        # Mock response
-        mock_response = Mock()
-        mock_response.json.return_value = {"id": 123456, "name": "Test App"}
-        mock_response.raise_for_status = Mock()
-        mock_requests.request.return_value = mock_response
+        responses.add(
+            responses.GET,
+            f"{API_BASE}/app",
+            json={"id": 123456, "name": "Test App"},
+            status=200,
+        )
 
         info = app.get_app_info()
 
         # Verify request
-        mock_requests.request.assert_called_once()
-        call_args = mock_requests.request.call_args
-        assert call_args[0][0] == "GET"
-        assert call_args[0][1] == "https://api.github.com/app"
-        assert "Authorization" in call_args[1]["headers"]
-        assert call_args[1]["headers"]["Authorization"].startswith("Bearer ")
+        assert len(responses.calls) == 1
+        request = responses.calls[0].request
+        assert request.method == "GET"
+        assert request.headers["Authorization"].startswith("Bearer ")
 
         # Verify response
         assert info["id"] == 123456
         assert info["name"] == "Test App"
 
-    def test_get_installation_id(self, github_app_config, mock_requests):
+    @responses.activate
+    def test_responses_decoded_with_orjson(self, github_app_config, monkeypatch):
+        """Test that orjson decodes API responses when it is installed"""
+        pytest.importorskip("orjson")
+        monkeypatch.setattr(
+            requests.Response,
+            "json",
+            lambda *args, **kwargs: pytest.fail("stdlib JSON decoder used"),
+        )
+        responses.add(
+            responses.GET,
+            f"{API_BASE}/app",
+            json={"id": 123456, "name": "Test App"},
+            status=200,
+        )
+
+        assert GitHubApp(github_app_config).get_app_info()["id"] == 123456
+
+    @responses.activate
+    def test_get_installation_id(self, github_app_config):
         """Test getting installation ID for a repository"""
         app = GitHubApp(github_app_config)
 
-        # Mock response
-        mock_response = Mock()
-        mock_response.json.return_value = INSTALLATION_REPOS_RESPONSE
-        mock_response.raise_for_status = Mock()
-        mock_requests.request.return_value = mock_response
+        responses.add(
+            responses.GET,
+            INSTALLATION_URL,
+            body=INSTALLATION_REPOS_BODY,
+            content_type="application/json",
+            status=200,
+        )
 
         installation_id = app.get_installation_id("test-org", "test-repo")
 
-        # Verify request
-        mock_requests.request.assert_called_once()
-        call_args = mock_requests.request.call_args
-        assert "repos/test-org/test-repo/installation" in call_args[0][1]
-
-        # Verify response
+        assert len(responses.calls) == 1
         assert installation_id == 789012
 
-    def test_get_installation_id_not_found(self, github_app_config, mock_requests):
-        """Test handling when no installation is found"""
+    @responses.activate
+    def test_get_installation_id_cached(self, github_app_config):
+        """Test that repository installation lookups are cached"""
         app = GitHubApp(github_app_config)
 
-        # Create a proper HTTPError exception with a mock response
-        mock_response = Mock()
-        mock_response.status_code = 404
+        responses.add(
+            responses.GET,
+            INSTALLATION_URL,
+            body=INSTALLATION_REPOS_BODY,
+            content_type="application/json",
+            status=200,
+        )
+
+        assert app.get_installation_id("test-org", "test-repo") == 789012
+        assert app.get_installation_id("test-org", "test-repo") == 789012
 
-        # Create the HTTPError exception properly
-        http_error = mock_requests.exceptions.HTTPError("404 Client Error")
-        http_error.response = mock_response
+        assert len(responses.calls) == 1
 
-        # Configure the mock to raise the exception
-        mock_requests.request.side_effect = http_error
+    @responses.activate
+    def test_get_installation_id_not_found(self, github_app_config):
+        """Test handling when no installation is found"""
+        app = GitHubApp(github_app_config)
+
+        responses.add(
+            responses.GET,
+            INSTALLATION_URL,
+            json={"message": "Not Found"},
+            status=404,
+        )
 
         installation_id = app.get_installation_id("test-org", "test-repo")
         assert installation_id is None
 
+    @responses.activate
+    def test_get_installation_id_not_found_is_cached(self, github_app_config):
+        """Test that a missing installation is remembered for a short time"""
+        app = GitHubApp(github_app_config)
+
+        responses.add(
+            responses.GET,
+            INSTALLATION_URL,
+            json={"message": "Not Found"},
+            status=404,
+        )
+
+        assert app.get_installation_id("test-org", "test-repo") is None
+        assert app.get_installation_id("test-org", "test-repo") is None
+        assert len(responses.calls) == 1
+
+        # Once the negative entry expires the repository is looked up again
+        with patch("time.monotonic", return_value=time.monotonic() + 61):
+            assert app.get_installation_id("test-org", "test-repo") is None
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_installation_id_cached(self, github_app_config, valid_installation_token):
+        """Test that repeated repository tokens need one installation lookup"""
+        app = GitHubApp(github_app_config)
+
+        responses.add(responses.GET, INSTALLATION_URL, json={"id": 789012}, status=200)
+        responses.add(
+            responses.POST, TOKEN_URL, json=valid_installation_token, status=201
+        )
+
+        app.get_repository_token("test-org", "test-repo")
+        app.get_repository_token("test-org", "test-repo")
+
+        installation_calls = [
+            call for call in responses.calls if call.request.url == INSTALLATION_URL
+        ]
+        assert len(installation_calls) == 1
+
+    @responses.activate
     def test_get_installation_token_success(
-        self, github_app_config, mock_requests, valid_installation_token
+        self, github_app_config, valid_installation_token
     ):
         """Test successful installation token retrieval"""
         app = GitHubApp(github_app_config)
 
-        # Mock response
-        mock_response = Mock()
-        mock_response.json.return_value = valid_installation_token
-        mock_response.raise_for_status = Mock()
-        mock_requests.request.return_value = mock_response
+        responses.add(
+            responses.POST, TOKEN_URL, json=valid_installation_token, status=201
+        )
 
         token = app.get_installation_token(789012)
 
         # Verify request
-        mock_requests.request.assert_called_once()
-        call_args = mock_requests.request.call_args
-        expected_url = "https://api.github.com/app/installations/789012/access_tokens"
-        assert call_args[0][1] == expected_url
+        assert len(responses.calls) == 1
+        assert responses.calls[0].request.url == TOKEN_URL
 
         # Verify token storage
         assert token == valid_installation_token["token"]
-        assert "token_789012" in app._token_cache
+        assert 789012 in app._token_cache
+        assert app.get_token_expiration(789012) is not None
+        assert app.get_token_expiration(1) is None
 
+    @responses.activate
     def test_get_installation_token_caching(
-        self, github_app_config, mock_requests, valid_installation_token
+        self, github_app_config, valid_installation_token
     ):
         """Test that installation token is cached and reused"""
         app = GitHubApp(github_app_config)
 
-        # Mock response
-        mock_response = Mock()
-        mock_response.json.return_value = valid_installation_token
-        mock_response.raise_for_status = Mock()
-        mock_requests.request.return_value = mock_response
+        responses.add(
+            responses.POST, TOKEN_URL, json=valid_installation_token, status=201
+        )
 
         # Get token twice
         token1 = app.get_installation_token(789012)
         token2 = app.get_installation_token(789012)
 
         # Should only make one request due to caching
-        assert mock_requests.request.call_count == 1
+        assert len(responses.calls) == 1
         assert token1 == token2
 
-    def test_get_repository_token(
-        self, github_app_config, mock_requests, valid_installation_token
+    @responses.activate
+    def test_multi_installation_no_crossinvalidation(
+        self, github_app_config, valid_installation_token
     ):
-        """Test getting a repository-specific token"""
+        """Test that tokens for different installations are cached independently"""
         app = GitHubApp(github_app_config)
 
-        # Mock installation lookup
-        installation_response = Mock()
-        installation_response.json.return_value = {"id": 789012}
-        installation_response.raise_for_status = Mock()
+        for installation_id, token in ((111, "ghs_first"), (222, "ghs_second")):
+            responses.add(
+                responses.POST,
+                f"{API_BASE}/app/installations/{installation_id}/access_tokens",
+                json={**valid_installation_token, "token": token},
+                status=201,
+            )
 
-        # Mock token response
-        token_response = Mock()
-        token_response.json.return_value = valid_installation_token
-        token_response.raise_for_status = Mock()
+        assert app.get_installation_token(111) == "ghs_first"
+        assert app.get_installation_token(222) == "ghs_second"
+        assert app.get_installation_token(111) == "ghs_first"
+        assert app.get_installation_token(222) == "ghs_second"
 
-        mock_requests.request.side_effect = [installation_response, token_response]
+        assert len(responses.calls) == 2
 
-        token = app.get_repository_token("test-org", "test-repo")
+    @responses.activate
+    def test_scoped_token_not_cached(
+        self, private_key_file, valid_installation_token, tmp_path
+    ):
+        """Test that a permission-scoped token never replaces the full token"""
+        cache_path = tmp_path / "tokens.json"
+        config = Config(
+            app_id="123456",
+            private_key_path=private_key_file,
+            token_cache_path=str(cache_path),
+        )
+        app = GitHubApp(config)
+        for token in ("ghs_full", "ghs_scoped"):
+            responses.add(
+                responses.POST,
+                TOKEN_URL,
+                json={**valid_installation_token, "token": token},
+                status=201,
+            )
+
+        assert app.get_installation_token(789012) == "ghs_full"
+        scoped = app.get_installation_token(789012, permissions={"checks": "write"})
+
+        assert scoped == "ghs_scoped"
+        assert json.loads(responses.calls[1].request.body) == {
+            "permissions": {"checks": "write"}
+        }
+        assert app.get_installation_token(789012) == "ghs_full"
+        assert GitHubApp(config).get_installation_token(789012) == "ghs_full"
+        assert len(responses.calls) == 2
+
+    @responses.activate
+    def test_concurrent_token_requests_share_refresh(
+        self, github_app_config, valid_installation_token
+    ):
+        """Test that concurrent cache misses trigger a single token request"""
+        app = GitHubApp(github_app_config)
+        start = threading.Barrier(8)
 
-        assert token == valid_installation_token["token"]
-        assert mock_requests.request.call_count == 2
+        def slow_response(request):
+            time.sleep(0.05)  # Keep the refresh in flight while others arrive
+            return 201, {}, json.dumps(valid_installation_token)
 
-    def test_create_check_run(
-        self, github_app_config, mock_requests, valid_installation_token
-    ):
-        """Test creating a check run"""
+        responses.add_callback(
+            responses.POST,
+            TOKEN_URL,
+            callback=slow_response,
+            content_type="application/json",
+        )
+
+        def fetch_token(_):
+            start.wait()
+            return app.get_installation_token(789012)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            tokens = list(executor.map(fetch_token, range(8)))
+
+        assert tokens == [valid_installation_token["token"]] * 8
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_get_repository_token(self, github_app_config, valid_installation_token):
+        """Test getting a repository-specific token"""
         app = GitHubApp(github_app_config)
 
-        # Mock responses
-        installation_response = Mock()
-        installation_response.json.return_value = {"id": 789012}
-        installation_response.raise_for_status = Mock()
+        responses.add(responses.GET, INSTALLATION_URL, json={"id": 789012}, status=200)
+        responses.add(
+            responses.POST, TOKEN_URL, json=valid_installation_token, status=201
+        )
+
+        token = app.get_repository_token("test-org", "test-repo")
 
-        token_response = Mock()
-        token_response.json.return_value = valid_installation_token
-        token_response.raise_for_status = Mock()
+        assert token == valid_installation_token["token"]
+        assert len(responses.calls) == 2
 
-        check_response = Mock()
-        check_response.json.return_value = {"id": 12345, "status": "queued"}
-        check_response.raise_for_status = Mock()
+    @responses.activate
+    def test_create_check_run(self, github_app_config, valid_installation_token):
+        """Test creating a check run"""
+        app = GitHubApp(github_app_config)
 
-        mock_requests.request.side_effect = [
-            installation_response,
-            token_response,
-            check_response,
-        ]
+        responses.add(responses.GET, INSTALLATION_URL, json={"id": 789012}, status=200)
+        responses.add(
+            responses.POST, TOKEN_URL, json=valid_installation_token, status=201
+        )
+        responses.add(
+            responses.POST,
+            f"{API_BASE}/repos/test-org/test-repo/check-runs",
+            json={"id": 12345, "status": "queued"},
+            status=201,
+        )
 
         result = app.create_check_run(
             "test-org", "test-repo", "test-check", "abc123def"
@@ -228,3 +420,129 @@ class TestGitHubApp:
 
         assert result["id"] == 12345
         assert result["status"] == "queued"
+
+    @responses.activate
+    def test_session_reused_across_requests(
+        self, github_app_config, valid_installation_token
+    ):
+        """Test that all API calls go through one pooled session"""
+        app = GitHubApp(github_app_config)
+
+        responses.add(
+            responses.GET,
+            f"{API_BASE}/app",
+            json={"id": 123456, "name": "Test App"},
+            status=200,
+        )
+        responses.add(
+            responses.POST, TOKEN_URL, json=valid_installation_token, status=201
+        )
+
+        with patch.object(
+            app._session, "request", wraps=app._session.request
+        ) as session_request:
+            app.get_app_info()
+            app.get_installation_token(789012)
+
+        assert session_request.call_count == 2
+        assert len(responses.calls) == 2
+
+    def test_context_manager_closes_session(self, github_app_config):
+        """Test that leaving the context closes the pooled HTTP session"""
+        app = GitHubApp(github_app_config)
+
+        with patch.object(app._session, "close") as close:
+            with app:
+                pass
+
+        close.assert_called_once()
+
+    @responses.activate
+    def test_token_cache_persisted_to_disk(
+        self, private_key_file, valid_installation_token, tmp_path
+    ):
+        """Test that a new instance reuses a token persisted by a previous one"""
+        cache_path = tmp_path / "tokens.json"
+        config = Config(
+            app_id="123456",
+            private_key_path=private_key_file,
+            installation_id="789012",
+            token_cache_path=str(cache_path),
+        )
+
+        responses.add(
+            responses.POST, TOKEN_URL, json=valid_installation_token, status=201
+        )
+
+        token1 = GitHubApp(config).get_installation_token(789012)
+        token2 = GitHubApp(config).get_installation_token(789012)
+
+        assert token1 == token2 == valid_installation_token["token"]
+        assert len(responses.calls) == 1
+        assert stat.S_IMODE(os.stat(cache_path).st_mode) == 0o600
+
+    @pytest.mark.parametrize(
+        "stored",
+        [
+            [],
+            {"123456": []},
+            {"123456": {"token_789012": []}},
+            {"123456": {"token_789012": {"token": "ghs_stale"}}},
+            {"123456": {"token_789012": {"token": 1, "expires_at": 2}}},
+        ],
+    )
+    @responses.activate
+    def test_malformed_token_cache_is_ignored(
+        self, private_key_file, valid_installation_token, tmp_path, stored
+    ):
+        """Test that a cache file with the wrong shape does not stop startup"""
+        cache_path = tmp_path / "tokens.json"
+        cache_path.write_text(json.dumps(stored))
+        config = Config(
+            app_id="123456",
+            private_key_path=private_key_file,
+            token_cache_path=str(cache_path),
+        )
+        responses.add(
+            responses.POST, TOKEN_URL, json=valid_installation_token, status=201
+        )
+
+        token = GitHubApp(config).get_installation_token(789012)
+
+        assert token == valid_installation_token["token"]
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_concurrent_refreshes_persist_every_token(
+        self, private_key_file, valid_installation_token, tmp_path
+    ):
+        """Test that refreshing several installations at once saves them all"""
+        cache_path = tmp_path / "tokens.json"
+        config = Config(
+            app_id="123456",
+            private_key_path=private_key_file,
+            token_cache_path=str(cache_path),
+        )
+        installation_ids = range(1, 41)
+        for installation_id in installation_ids:
+            responses.add(
+                responses.POST,
+                f"{API_BASE}/app/installations/{installation_id}/access_tokens",
+                json={**valid_installation_token, "token": f"ghs_{installation_id}"},
+                status=201,
+            )
+        # Switch threads as often as possible to expose unlocked cache access
+        previous_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            app = GitHubApp(config)
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                tokens = list(
+                    executor.map(app.get_installation_token, installation_ids)
+                )
+        finally:
+            sys.setswitchinterval(previous_interval)
+
+        assert tokens == [f"ghs_{i}" for i in installation_ids]
+        stored = json.loads(cache_path.read_text())["123456"]
+        assert set(stored) == {f"token_{i}" for i in installation_ids}
@@ -1,11 +1,18 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 
 import pytest
+import requests
 import responses
 
-from github_auth_app.app import GitHubApp
+from github_auth_app.app import GitHubApp, _iso_z
 from github_auth_app.config import Config
 from github_auth_app.jenkins_helper import GitHubAppJenkinsHelper
+from tests.fixtures.mock_responses import INSTALLATIONS_BODY
 
 
 @pytest.mark.integration
@@ -24,11 +31,7 @@ class TestGitHubAppIntegration:
     def test_full_workflow(self, github_app):
         """Test complete workflow from authentication to API usage"""
         # Use a future expiration date
-        future_date = (
-            (datetime.now(timezone.utc) + timedelta(hours=1))
-            .isoformat()
-            .replace("+00:00", "Z")
-        )
+        future_date = _iso_z(datetime.now(timezone.utc) + timedelta(hours=1))
 
         # Mock installation token endpoint
         responses.add(
@@ -75,6 +78,9 @@ class TestGitHubAppIntegration:
 
         # Verify the correct headers were sent
         assert len(responses.calls) == 3
+        for call in responses.calls:
+            assert call.request.headers["Accept"] == "application/vnd.github.v3+json"
+            assert call.request.headers["User-Agent"] == "GitHubApp/123456"
         assert "Authorization" in responses.calls[2].request.headers
         assert (
             responses.calls[2].request.headers["Authorization"]
@@ -85,11 +91,7 @@ class TestGitHubAppIntegration:
     def test_jenkins_integration(self, github_app):
         """Test Jenkins helper integration"""
         # Use a future expiration date
-        future_date = (
-            (datetime.now(timezone.utc) + timedelta(hours=1))
-            .isoformat()
-            .replace("+00:00", "Z")
-        )
+        future_date = _iso_z(datetime.now(timezone.utc) + timedelta(hours=1))
 
         # Mock installation endpoint
         responses.add(
@@ -126,19 +128,11 @@ class TestGitHubAppIntegration:
     @responses.activate
     def test_token_expiration_handling(self, github_app):
         """Test that expired tokens are refreshed"""
-        # First token - expires soon
-        soon_expiry = (
-            (datetime.now(timezone.utc) + timedelta(minutes=3))
-            .isoformat()
-            .replace("+00:00", "Z")
-        )
+        # First token - expires inside the refresh margin
+        soon_expiry = _iso_z(datetime.now(timezone.utc) + timedelta(seconds=30))
 
         # Second token - expires in an hour
-        later_expiry = (
-            (datetime.now(timezone.utc) + timedelta(hours=1))
-            .isoformat()
-            .replace("+00:00", "Z")
-        )
+        later_expiry = _iso_z(datetime.now(timezone.utc) + timedelta(hours=1))
 
         # Mock first token response
         responses.add(
@@ -165,6 +159,420 @@ class TestGitHubAppIntegration:
         assert token2 == "ghs_second_token"
         assert len(responses.calls) == 2
 
+    @responses.activate
+    def test_revoked_token_is_refreshed(self, github_app):
+        """Test that a 401 from a revoked token triggers one refresh and retry"""
+        future_date = _iso_z(datetime.now(timezone.utc) + timedelta(hours=1))
+
+        responses.add(
+            responses.GET,
+            "https://api.github.com/repos/test-org/test-repo/installation",
+            json={"id": 789012},
+            status=200,
+        )
+        responses.add(
+            responses.POST,
+            "https://api.github.com/app/installations/789012/access_tokens",
+            json={"token": "ghs_revoked_token", "expires_at": future_date},
+            status=201,
+        )
+        responses.add(
+            responses.POST,
+            "https://api.github.com/app/installations/789012/access_tokens",
+            json={"token": "ghs_fresh_token", "expires_at": future_date},
+            status=201,
+        )
+        responses.add(
+            responses.PATCH,
+            "https://api.github.com/repos/test-org/test-repo/check-runs/4",
+            json={"message": "Bad credentials"},
+            status=401,
+        )
+        responses.add(
+            responses.PATCH,
+            "https://api.github.com/repos/test-org/test-repo/check-runs/4",
+            json={"id": 4, "status": "completed"},
+            status=200,
+        )
+
+        check_run = github_app.update_check_run(
+            "test-org", "test-repo", 4, status="completed"
+        )
+
+        assert check_run["status"] == "completed"
+        assert (
+            responses.calls[-1].request.headers["Authorization"]
+            == "token ghs_fresh_token"
+        )
+        assert github_app._unexpected_401_count == 1
+
+    @responses.activate
+    def test_concurrent_401s_share_one_token_refresh(self, github_app):
+        """Test that workers rejected with the same token re-mint it only once"""
+        future_date = _iso_z(datetime.now(timezone.utc) + timedelta(hours=1))
+        minted = iter(["ghs_revoked_token", "ghs_fresh_token", "ghs_extra_token"])
+
+        def mint_token(request):
+            body = {"token": next(minted), "expires_at": future_date}
+            return 201, {}, json.dumps(body)
+
+        def patch_check_run(request):
+            if request.headers["Authorization"] == "token ghs_revoked_token":
+                return 401, {}, json.dumps({"message": "Bad credentials"})
+            return 200, {}, json.dumps({"id": 4, "status": "completed"})
+
+        responses.add(
+            responses.GET,
+            "https://api.github.com/repos/test-org/test-repo/installation",
+            json={"id": 789012},
+            status=200,
+        )
+        responses.add_callback(
+            responses.POST,
+            "https://api.github.com/app/installations/789012/access_tokens",
+            callback=mint_token,
+            content_type="application/json",
+        )
+        responses.add_callback(
+            responses.PATCH,
+            "https://api.github.com/repos/test-org/test-repo/check-runs/4",
+            callback=patch_check_run,
+            content_type="application/json",
+        )
+
+        assert github_app.get_repository_token("test-org", "test-repo") == (
+            "ghs_revoked_token"
+        )
+        start = threading.Barrier(8)
+
+        def update(_):
+            start.wait()
+            return github_app.update_check_run(
+                "test-org", "test-repo", 4, status="completed"
+            )
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(update, range(8)))
+
+        assert [result["status"] for result in results] == ["completed"] * 8
+        token_calls = [
+            call for call in responses.calls if "access_tokens" in call.request.url
+        ]
+        assert len(token_calls) == 2
+
+    @responses.activate
+    def test_jenkins_helper_follows_refreshed_token(self, github_app):
+        """Test that the helper reads credentials from the app's caches"""
+        future_date = _iso_z(datetime.now(timezone.utc) + timedelta(hours=1))
+
+        responses.add(
+            responses.GET,
+            "https://api.github.com/repos/test-org/test-repo/installation",
+            json={"id": 789012},
+            status=200,
+        )
+        for token in ("ghs_revoked_token", "ghs_fresh_token"):
+            responses.add(
+                responses.POST,
+                "https://api.github.com/app/installations/789012/access_tokens",
+                json={"token": token, "expires_at": future_date},
+                status=201,
+            )
+        responses.add(
+            responses.PATCH,
+            "https://api.github.com/repos/test-org/test-repo/check-runs/4",
+            json={"message": "Bad credentials"},
+            status=401,
+        )
+        responses.add(
+            responses.PATCH,
+            "https://api.github.com/repos/test-org/test-repo/check-runs/4",
+            json={"id": 4, "status": "completed"},
+            status=200,
+        )
+
+        helper = GitHubAppJenkinsHelper(github_app)
+        before = helper.get_credentials_for_jenkins("test-org", "test-repo")
+        github_app.update_check_run("test-org", "test-repo", 4, status="completed")
+        after = helper.get_credentials_for_jenkins("test-org", "test-repo")
+        clone_cmd = helper.clone_repository_command("test-org", "test-repo")
+
+        assert before["token"] == "ghs_revoked_token"
+        assert after["token"] == "ghs_fresh_token"
+        assert "ghs_fresh_token" in clone_cmd
+        # Repeat lookups are served from the app's installation and token caches
+        assert len(responses.calls) == 5
+
+    @responses.activate
+    def test_get_app_info_revalidates_with_etag(self, github_app):
+        """Test that a repeated GET sends If-None-Match and reuses a 304 body"""
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            json={"id": 123456, "name": "Test App"},
+            headers={"ETag": '"abc123"'},
+            status=200,
+        )
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            status=304,
+        )
+
+        first = github_app.get_app_info()
+        second = github_app.get_app_info()
+
+        assert second == first == {"id": 123456, "name": "Test App"}
+        assert "If-None-Match" not in responses.calls[0].request.headers
+        assert responses.calls[1].request.headers["If-None-Match"] == '"abc123"'
+
+    @responses.activate
+    def test_etag_cache_survives_jwt_rotation(self, github_app):
+        """Test that a re-signed JWT still revalidates the same cache entry"""
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            json={"id": 123456, "name": "Test App"},
+            headers={"ETag": '"abc123"'},
+            status=200,
+        )
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            status=304,
+        )
+
+        github_app.get_app_info()
+        github_app._jwt = None  # Force a new JWT, as after the old one expires
+        github_app.get_app_info()
+
+        assert responses.calls[1].request.headers["If-None-Match"] == '"abc123"'
+        assert list(github_app._etag_cache) == ["https://api.github.com/app"]
+
+    @responses.activate
+    def test_etag_cached_body_is_not_shared(self, github_app):
+        """Test that mutating a returned body does not change later 304 results"""
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            json={"id": 123456, "name": "Test App"},
+            headers={"ETag": '"abc123"'},
+            status=200,
+        )
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            status=304,
+        )
+
+        github_app.get_app_info()["name"] = "Changed"
+
+        assert github_app.get_app_info()["name"] == "Test App"
+
+    @responses.activate
+    def test_preload_installations(self, github_app):
+        """Test bulk-loading installation IDs with paginated repository lists"""
+        future_date = _iso_z(datetime.now(timezone.utc) + timedelta(hours=1))
+
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app/installations?per_page=100",
+            body=INSTALLATIONS_BODY,
+            content_type="application/json",
+            status=200,
+        )
+        responses.add(
+            responses.POST,
+            "https://api.github.com/app/installations/789012/access_tokens",
+            json={"token": "ghs_preload_token", "expires_at": future_date},
+            status=201,
+        )
+        responses.add(
+            responses.GET,
+            "https://api.github.com/installation/repositories?per_page=100",
+            json={
+                "repositories": [
+                    {"name": "repo-a", "owner": {"login": "test-org"}},
+                ]
+            },
+            headers={
+                "Link": '<https://api.github.com/installation/repositories?per_page=100&page=2>; rel="next"'
+            },
+            status=200,
+        )
+        responses.add(
+            responses.GET,
+            "https://api.github.com/installation/repositories?per_page=100&page=2",
+            json={
+                "repositories": [
+                    {"name": "repo-b", "owner": {"login": "test-org"}},
+                ]
+            },
+            status=200,
+        )
+
+        assert github_app.preload_installations(orgs=["test-org"]) == 2
+        calls_after_preload = len(responses.calls)
+
+        # Cached lookups must not hit the installation endpoint
+        assert github_app.get_installation_id("test-org", "repo-a") == 789012
+        assert github_app.get_installation_id("test-org", "repo-b") == 789012
+        assert len(responses.calls) == calls_after_preload
+
+    @responses.activate
+    def test_preload_installations_includes_enterprise_accounts(self, github_app):
+        """Test that an installation without an account login is still preloaded"""
+        future_date = _iso_z(datetime.now(timezone.utc) + timedelta(hours=1))
+
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app/installations?per_page=100",
+            body=INSTALLATIONS_BODY,
+            content_type="application/json",
+            status=200,
+        )
+        for installation_id, owner in ((789012, "test-org"), (345678, "ent-org")):
+            responses.add(
+                responses.POST,
+                f"https://api.github.com/app/installations/{installation_id}/access_tokens",
+                json={"token": f"ghs_{installation_id}", "expires_at": future_date},
+                status=201,
+            )
+            responses.add(
+                responses.GET,
+                "https://api.github.com/installation/repositories?per_page=100",
+                json={"repositories": [{"name": "repo", "owner": {"login": owner}}]},
+                status=200,
+            )
+
+        assert github_app.preload_installations() == 2
+        assert github_app.get_installation_id("ent-org", "repo") == 345678
+
+    @responses.activate
+    def test_preload_installations_skips_other_orgs(self, github_app):
+        """Test that installations outside the requested orgs are not listed"""
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app/installations?per_page=100",
+            body=INSTALLATIONS_BODY,
+            content_type="application/json",
+            status=200,
+        )
+
+        assert github_app.preload_installations(orgs=["other-org"]) == 0
+        assert len(responses.calls) == 1
+
+    @responses.activate
+    def test_secondary_rate_limit_is_retried(self, github_app):
+        """Test that a 429 with Retry-After is waited out and retried"""
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            json={"message": "You have exceeded a secondary rate limit"},
+            headers={"Retry-After": "2"},
+            status=429,
+        )
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            json={"id": 123456, "name": "Test App"},
+            status=200,
+        )
+
+        with patch("github_auth_app.app.time.sleep") as mock_sleep:
+            info = github_app.get_app_info()
+
+        assert info["id"] == 123456
+        assert len(responses.calls) == 2
+        mock_sleep.assert_called_once()
+        assert 0 < mock_sleep.call_args[0][0] <= 2
+
+    @responses.activate
+    def test_rate_limit_gives_up_after_max_attempts(self, github_app):
+        """Test that persistent rate limiting eventually raises"""
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            json={"message": "You have exceeded a secondary rate limit"},
+            headers={"Retry-After": "1"},
+            status=429,
+        )
+
+        with patch("github_auth_app.app.time.sleep"):
+            with pytest.raises(requests.HTTPError):
+                github_app.get_app_info()
+
+        assert len(responses.calls) == 3
+
+    @responses.activate
+    def test_distant_rate_limit_reset_is_not_retried(self, github_app):
+        """Test that a rate limit resetting beyond the wait bound raises at once"""
+        reset = datetime.now(timezone.utc) + timedelta(minutes=50)
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            json={"message": "API rate limit exceeded"},
+            headers={
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": str(int(reset.timestamp())),
+            },
+            status=403,
+        )
+
+        with patch("github_auth_app.app.time.sleep") as mock_sleep:
+            with pytest.raises(requests.HTTPError):
+                github_app.get_app_info()
+
+        assert len(responses.calls) == 1
+        mock_sleep.assert_not_called()
+        assert github_app._rate_limited_until == 0.0
+
+    @pytest.mark.parametrize("reset_headers", [{}, {"X-RateLimit-Reset": "soon"}])
+    @responses.activate
+    def test_rate_limit_without_usable_reset_is_not_retried(
+        self, github_app, reset_headers
+    ):
+        """Test that an exhausted quota with no usable reset raises at once"""
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            json={"message": "API rate limit exceeded"},
+            headers={"X-RateLimit-Remaining": "0", **reset_headers},
+            status=403,
+        )
+
+        with patch("github_auth_app.app.time.sleep") as mock_sleep:
+            with pytest.raises(requests.HTTPError):
+                github_app.get_app_info()
+
+        assert len(responses.calls) == 1
+        mock_sleep.assert_not_called()
+
+    @responses.activate
+    def test_retry_after_http_date_is_honoured(self, github_app):
+        """Test that a Retry-After given as an HTTP date is waited out"""
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=5)
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            json={"message": "You have exceeded a secondary rate limit"},
+            headers={"Retry-After": retry_at.strftime("%a, %d %b %Y %H:%M:%S GMT")},
+            status=429,
+        )
+        responses.add(
+            responses.GET,
+            "https://api.github.com/app",
+            json={"id": 123456, "name": "Test App"},
+            status=200,
+        )
+
+        with patch("github_auth_app.app.time.sleep") as mock_sleep:
+            info = github_app.get_app_info()
+
+        assert info["id"] == 123456
+        mock_sleep.assert_called_once()
+        assert 0 < mock_sleep.call_args[0][0] <= 5
+
     @responses.activate
     def test_repository_not_installed(self, github_app):
         """Test handling of repositories without app installation"""
@@ -192,11 +600,7 @@ class TestGitHubAppIntegration:
     def test_deployment_workflow(self, github_app):
         """Test deployment creation and status updates"""
         # Setup token
-        future_date = (
-            (datetime.now(timezone.utc) + timedelta(hours=1))
-            .isoformat()
-            .replace("+00:00", "Z")
-        )
+        future_date = _iso_z(datetime.now(timezone.utc) + timedelta(hours=1))
 
         responses.add(
             responses.GET,
@@ -250,3 +654,56 @@ class TestGitHubAppIntegration:
         )
         assert status["state"] == "success"
         assert status["deployment_id"] == 1
+
+    @responses.activate
+    def test_async_check_run_burst(self, github_app):
+        """Test creating a burst of check runs concurrently"""
+        future_date = _iso_z(datetime.now(timezone.utc) + timedelta(hours=1))
+
+        responses.add(
+            responses.GET,
+            "https://api.github.com/repos/test-org/test-repo/installation",
+            json={"id": 789012},
+            status=200,
+        )
+        responses.add(
+            responses.POST,
+            "https://api.github.com/app/installations/789012/access_tokens",
+            json={"token": "ghs_async_token", "expires_at": future_date},
+            status=201,
+        )
+        responses.add(
+            responses.POST,
+            "https://api.github.com/repos/test-org/test-repo/check-runs",
+            json={"id": 7, "status": "queued"},
+            status=201,
+        )
+
+        async def burst():
+            # Warm the installation and token caches before fanning out
+            await asyncio.to_thread(
+                github_app.get_installation_id, "test-org", "test-repo"
+            )
+            await github_app.aget_installation_token(789012)
+            return await asyncio.gather(
+                *(
+                    github_app.acreate_check_run(
+                        "test-org", "test-repo", f"check-{i}", "abc123"
+                    )
+                    for i in range(3)
+                )
+            )
+
+        results = asyncio.run(burst())
+
+        assert [result["id"] for result in results] == [7, 7, 7]
+        token_calls = [
+            call for call in responses.calls if "access_tokens" in call.request.url
+        ]
+        assert len(token_calls) == 1
+        installation_calls = [
+            call
+            for call in responses.calls
+            if call.request.url.endswith("/installation")
+        ]
+        assert len(installation_calls) == 1